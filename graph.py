@@ -1,34 +1,211 @@
 import networkx as nx
-import plotly.graph_objects as go
-from typing import List, Tuple
-import math
+import plotly.io as pio
+from scipy.optimize import minimize
+from scipy.sparse import csr_matrix
+from pathlib import Path
+from typing import List, Optional, Tuple
+import numpy as np
+import hashlib
+import importlib.util
+import json
+import shutil
+
+
+CACHE_DIR = Path.home() / ".cache" / "supply_chain"  # layout_<key>.npy and fig<version>_<key>.json
+FIGURE_VERSION = 2  # bump when the assembled figure changes, so older cached figures are not reused
+CACHE_ENTRIES = 32  # files kept per kind, the oldest are evicted
+LARGE_GRAPH = 500  # above this, the O(N^2) spring simulation gets too slow
+SHORTEN_EDGES_LIMIT = 2000  # from here on edges are drawn center to center
+HOVER_TEMPLATE = "<b>%s</b><br>Inventory: %d<br>Backorders: %d<br>Remaining time: %d"
+
+_FIGURE = None  # (topology key, figure dict) of the last network drawn
 
 
 # =====================================================
-# Helper: shorten edge so it touches node circle edge
+# Helper: shorten edges so they touch node circle edges
 # =====================================================
-def shorten_edge(x0, y0, x1, y1, r):
+def shorten_edges(p0: np.ndarray, p1: np.ndarray, r: float):
     """
-    Shorten a line so it starts/ends at the circle boundary.
+    Shorten all lines at once so they start/end at the circle boundary.
+    p0, p1 = (E, 2) arrays of edge start/end points
     r = node radius (same for all nodes)
+    Returns (starts, ends, unit_vectors), each of shape (E, 2).
     """
-    dx = x1 - x0
-    dy = y1 - y0
-    dist = math.sqrt(dx**2 + dy**2)
+    d = p1 - p0
+    dist = np.linalg.norm(d, axis=1, keepdims=True)
 
-    if dist == 0:
-        return x0, y0, x1, y1
-
-    ux = dx / dist
-    uy = dy / dist
+    # Zero-length edges keep a zero unit vector and are left untouched
+    u = np.divide(d, dist, out=np.zeros_like(d), where=dist > 0)
 
     # Move start and end inward by radius
-    return (
-        x0 + ux * r,
-        y0 + uy * r,
-        x1 - ux * r,
-        y1 - uy * r,
+    return p0 + u * r, p1 - u * r, u
+
+
+# =====================================================
+# Helper: node positions (cached, size-dependent layout)
+# =====================================================
+def _adjacency(nodes: List, connections: List[Tuple]) -> csr_matrix:
+    """
+    Unweighted (N, N) adjacency matrix, rows/columns in `nodes` order.
+    """
+    index = {node.id: i for i, node in enumerate(nodes)}
+    rows = [index[src.id] for src, _ in connections]
+    cols = [index[tgt.id] for _, tgt in connections]
+
+    adj = csr_matrix(
+        (np.ones(len(rows)), (rows, cols)), shape=(len(nodes), len(nodes))
+    )
+    adj.data[:] = 1.0  # repeated connections are still a single edge
+    return adj
+
+
+def _layout_key(adj: csr_matrix) -> str:
+    """
+    Hash of the graph topology (node count and edge index pairs), used as
+    the cache key. Node ids are left out so relabelled networks still hit.
+    """
+    coo = adj.tocoo()
+    topology = repr(("xy", adj.shape[0], sorted(zip(coo.row.tolist(), coo.col.tolist()))))
+    return hashlib.blake2b(topology.encode(), digest_size=16).hexdigest()
+
+
+def _evict(pattern: str) -> None:
+    """
+    Keep only the CACHE_ENTRIES most recently written files matching `pattern`.
+    """
+    files = sorted(CACHE_DIR.glob(pattern), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in files[CACHE_ENTRIES:]:
+        path.unlink(missing_ok=True)
+
+
+def _load_layout(key: str, n: int) -> Optional[np.ndarray]:
+    try:
+        xy = np.load(CACHE_DIR / f"layout_{key}.npy", allow_pickle=False)
+    except (OSError, ValueError):
+        return None
+    return xy if xy.shape == (n, 2) else None
+
+
+def _save_layout(key: str, xy: np.ndarray) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    np.save(CACHE_DIR / f"layout_{key}.npy", xy)
+    _evict("layout_*.npy")
+
+
+def _spring_layout(adj: csr_matrix, seed: int = 42, iterations: int = 50) -> np.ndarray:
+    """
+    Fruchterman-Reingold force simulation on a dense adjacency matrix
+    (same algorithm and seeding as networkx.spring_layout).
+    """
+    n = adj.shape[0]
+    a = adj.toarray()
+    pos = np.random.RandomState(seed).rand(n, 2)
+
+    k = np.sqrt(1.0 / n)  # optimal distance between nodes
+    t = np.ptp(pos, axis=0).max() * 0.1  # largest step allowed, cools linearly
+    dt = t / (iterations + 1)
+
+    for _ in range(iterations):
+        delta = pos[:, None, :] - pos[None, :, :]
+        distance = np.clip(np.linalg.norm(delta, axis=-1), 0.01, None)
+        displacement = np.einsum("ijk,ij->ik", delta, k * k / distance**2 - a * distance / k)
+
+        length = np.clip(np.linalg.norm(displacement, axis=-1), 0.01, None)
+        step = displacement * (t / length)[:, None]
+        pos += step
+        t -= dt
+
+        if np.linalg.norm(step) / n < 1e-4:
+            break
+
+    return pos
+
+
+def _lbfgs_layout(adj: csr_matrix, seed: int = 42) -> np.ndarray:
+    """
+    Fruchterman-Reingold layout found by minimizing the force energy with
+    L-BFGS instead of running the fixed-step force simulation.
+    """
+    n = adj.shape[0]
+    coo = adj.tocoo()
+    src, dst = coo.row, coo.col
+
+    k = 1.0 / np.sqrt(n)  # optimal distance between nodes
+    gravity = 0.01  # keeps disconnected components from drifting apart
+
+    def energy(flat):
+        x = flat.reshape(n, 2)
+        grad = gravity * x
+
+        # Attraction along edges: |d|^3 / 3k
+        d = x[src] - x[dst]
+        dist = np.linalg.norm(d, axis=1)
+        pull = (dist / k)[:, None] * d
+        np.add.at(grad, src, pull)
+        np.subtract.at(grad, dst, pull)
+
+        # Repulsion between all pairs: -k^2 ln|d|, with pairwise distances
+        # from the Gram matrix so no (n, n, 2) array is materialized
+        sq = (x**2).sum(axis=1)
+        dist2 = np.maximum(sq[:, None] + sq[None, :] - 2.0 * x @ x.T, 1e-12)
+        np.fill_diagonal(dist2, 1.0)
+        w = 1.0 / dist2
+        np.fill_diagonal(w, 0.0)
+        grad -= k**2 * (x * w.sum(axis=1)[:, None] - w @ x)
+
+        value = (
+            0.5 * gravity * sq.sum()
+            + (dist**3).sum() / (3 * k)
+            - 0.25 * k**2 * np.log(dist2).sum()
+        )
+        return value, grad.ravel()
+
+    x0 = np.random.default_rng(seed).random((n, 2))
+    result = minimize(
+        energy, x0.ravel(), jac=True, method="L-BFGS-B", options=dict(maxiter=200)
     )
+    return result.x.reshape(n, 2)
+
+
+def _has_sfdp() -> bool:
+    return shutil.which("sfdp") is not None and importlib.util.find_spec("pygraphviz") is not None
+
+
+def _sfdp_layout(adj: csr_matrix) -> np.ndarray:
+    """
+    Graphviz SFDP (multilevel force layout); needs sfdp and pygraphviz.
+    """
+    G = nx.from_scipy_sparse_array(adj, create_using=nx.DiGraph)
+    pos = nx.nx_agraph.graphviz_layout(G, prog="sfdp")
+    return np.array([pos[i] for i in range(adj.shape[0])], dtype=float)
+
+
+def compute_layout(adj: csr_matrix, key: str = None) -> np.ndarray:
+    """
+    (N, 2) node positions in [-1, 1] coordinates, rows in `adj` order.
+    Reuses positions cached on disk for an identical topology; otherwise
+    uses SFDP (if graphviz and pygraphviz are installed) or L-BFGS for
+    large graphs, and a spring layout for small ones.
+    """
+    n = adj.shape[0]
+    if n <= 1:
+        return np.zeros((n, 2))
+
+    key = key or _layout_key(adj)
+    xy = _load_layout(key, n)
+    if xy is not None:
+        return xy
+
+    if n > LARGE_GRAPH and _has_sfdp():
+        xy = _sfdp_layout(adj)
+    elif n > LARGE_GRAPH:
+        xy = _lbfgs_layout(adj, seed=42)
+    else:
+        xy = _spring_layout(adj, seed=42)
+    xy = nx.rescale_layout(xy)
+
+    _save_layout(key, xy)
+    return xy
 
 
 # =====================================================
@@ -40,46 +217,75 @@ def create_graph_window(
     title: str = "Supply Chain Network",
 ):
     """
-    Interactive supply chain graph using NetworkX + Plotly.
+    Interactive supply chain graph using Plotly.
     Arrows connect to node edges (not centers) and render behind nodes.
+    Arrow heads are a single marker trace rather than one annotation per edge.
+    Redrawing the same network (e.g. after each simulation step, or in a
+    later run via the on-disk figure cache) reuses the previous figure and
+    only updates the node state.
     """
+    global _FIGURE
 
     NODE_RADIUS = 0.06  # controls visual spacing / arrow offset
 
-    G = nx.DiGraph()
+    adj = _adjacency(nodes, connections)
+    key = _layout_key(adj)
 
-    # Add nodes with metadata
-    for node in nodes:
-        G.add_node(
-            node.id,
-            label=node.name,
-            inventory=node.inventory,
-            backorders=node.backorders,
-            remaining_time=node.remaining_time,
-        )
+    labels = [node.name for node in nodes]
+    hover_text = [
+        HOVER_TEMPLATE % (node.name, node.inventory, node.backorders, node.remaining_time)
+        for node in nodes
+    ]
 
-    # Add directed edges
-    for src, tgt in connections:
-        G.add_edge(src.id, tgt.id)
+    # Known topology (last call, or cached on disk by an earlier run):
+    # patch the node trace, skip the rebuild
+    cache_path = CACHE_DIR / f"fig{FIGURE_VERSION}_{key}.json"
+    if _FIGURE is not None and _FIGURE[0] == key:
+        fig = _FIGURE[1]
+    else:
+        # A missing, truncated or corrupt file just means a rebuild
+        try:
+            fig = json.loads(cache_path.read_text())
+        except (OSError, json.JSONDecodeError):
+            fig = None
 
-    # Layout
-    pos = nx.spring_layout(G, seed=42)
+    if fig is not None:
+        node_trace = fig["data"][-1]  # nodes are drawn last
+        node_trace["text"], node_trace["hovertext"] = labels, hover_text
+        fig["layout"]["title"]["text"] = title
+        _FIGURE = (key, fig)
+        pio.show(fig, validate=False)
+        return
+
+    # Layout (positions are rows aligned with `nodes`)
+    xy = compute_layout(adj, key)
 
     # -----------------------
     # Build edge traces
     # -----------------------
-    edge_x, edge_y = [], []
-
-    for u, v in G.edges():
-        x0, y0 = pos[u]
-        x1, y1 = pos[v]
+    # One pass over the edges: line segments and arrow heads are both
+    # derived from these endpoint arrays
+    coo = adj.tocoo()
+    n_edges = coo.nnz
 
-        xs, ys, xe, ye = shorten_edge(x0, y0, x1, y1, NODE_RADIUS)
+    p0, p1 = xy[coo.row], xy[coo.col]
+    if n_edges < SHORTEN_EDGES_LIMIT:
+        starts, ends, directions = shorten_edges(p0, p1, NODE_RADIUS)
+        tips = ends
+    else:
+        # Large graphs: skip the sqrt/divide and draw center to center; the
+        # arrow heads go on the segment midpoints, where no node marker hides them
+        starts, ends, directions = p0, p1, p1 - p0
+        tips = p0 + 0.5 * directions
 
-        edge_x += [xs, xe, None]
-        edge_y += [ys, ye, None]
+    # Interleave start, end, None so plotly breaks the line between edges
+    edge_x = np.full(3 * n_edges, None, dtype=object)
+    edge_y = np.full(3 * n_edges, None, dtype=object)
+    edge_x[0::3], edge_x[1::3] = starts[:, 0], ends[:, 0]
+    edge_y[0::3], edge_y[1::3] = starts[:, 1], ends[:, 1]
 
-    edge_trace = go.Scatter(
+    edge_trace = dict(
+        type="scattergl",
         x=edge_x,
         y=edge_y,
         mode="lines",
@@ -90,25 +296,10 @@ def create_graph_window(
     # -----------------------
     # Build node traces (on top)
     # -----------------------
-    node_x, node_y, hover_text, labels = [], [], [], []
-
-    for node_id in G.nodes():
-        x, y = pos[node_id]
-        data = G.nodes[node_id]
-
-        node_x.append(x)
-        node_y.append(y)
-        labels.append(data["label"])
-        hover_text.append(
-            f"<b>{data['label']}</b><br>"
-            f"Inventory: {data['inventory']}<br>"
-            f"Backorders: {data['backorders']}<br>"
-            f"Remaining time: {data['remaining_time']}"
-        )
-
-    node_trace = go.Scatter(
-        x=node_x,
-        y=node_y,
+    node_trace = dict(
+        type="scattergl",
+        x=xy[:, 0],
+        y=xy[:, 1],
         mode="markers+text",
         text=labels,
         textposition="bottom center",
@@ -122,46 +313,44 @@ def create_graph_window(
     )
 
     # -------------------------
-    # Arrow heads (annotations)
+    # Arrow heads (one marker trace at edge tips)
     # -------------------------
-    annotations = []
-    for u, v in G.edges():
-        x0, y0 = pos[u]
-        x1, y1 = pos[v]
-        xs, ys, xe, ye = shorten_edge(x0, y0, x1, y1, NODE_RADIUS)
-
-        annotations.append(
-            dict(
-                ax=xs,
-                ay=ys,
-                x=xe,
-                y=ye,
-                xref="x",
-                yref="y",
-                axref="x",
-                ayref="y",
-                showarrow=True,
-                arrowhead=3,
-                arrowsize=1.2,
-                arrowwidth=2,
-                arrowcolor="black",
-            )
-        )
+    # marker.angle rotates clockwise from "up", so measure it from the y axis
+    arrow_trace = dict(
+        type="scattergl",
+        x=tips[:, 0],
+        y=tips[:, 1],
+        mode="markers",
+        hoverinfo="none",
+        marker=dict(
+            symbol="triangle-up",
+            size=12,
+            angle=np.degrees(np.arctan2(directions[:, 0], directions[:, 1])),
+            color="black",
+        ),
+    )
 
     # -----------------------
     # Final figure
     # -----------------------
-    fig = go.Figure(
-        data=[edge_trace, node_trace],
-        layout=go.Layout(
-            title=title,
+    # Plain dicts skip graph_objects validation; the figure is built here,
+    # so there is nothing for plotly to coerce
+    fig = dict(
+        data=[edge_trace, arrow_trace, node_trace],
+        layout=dict(
+            title=dict(text=title),
             showlegend=False,
             hovermode="closest",
-            annotations=annotations,
             margin=dict(l=20, r=20, t=40, b=20),
             xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+            # Equal unit lengths, so the data-space arrow angles match the screen
+            yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, scaleanchor="x", scaleratio=1),
         ),
     )
 
-    fig.show()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(pio.to_json(fig, validate=False))
+    _evict("fig*.json")
+
+    _FIGURE = (key, fig)
+    pio.show(fig, validate=False)
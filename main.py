@@ -2,169 +2,537 @@ from dataclasses import dataclass, field
 from enum import Enum, auto
 from numpy.random import Generator
 from numpy import random as rnd
-from node import Node, StateCategory
+from model_types import PolicyType, StateCategory
+from node import Node, NodeArray, NodeType
 from graph import create_graph_window
-from policy import BaseStockPolicy, FixedOrderPolicy, MinMaxPolicy
-from typing import List
+from policy import (
+    BaseStockPolicy, FixedOrderPolicy, MinMaxPolicy, POLICY_KERNELS,
+    base_stock_rule, min_max_rule, fixed_order_rule,
+)
+from typing import List, Optional
+from numba import njit, prange
 import numpy as np
+import logging
+import sys
+
+
+MAX_LEAD_TIME = 3  # lead times are drawn from 1..MAX_LEAD_TIME periods
+
+# Policy codes used inside the compiled kernels (PolicyType values)
+BASE_STOCK = PolicyType.BASE_STOCK.value
+MIN_MAX = PolicyType.MIN_MAX.value
+
+logger = logging.getLogger(__name__)
+
+# Helper functions to simulate an episode
+
+@njit(cache=True)
+def order_quantity(code, p0, p1, inventory, capacity, pending):
+    """
+    Order rule of a policy given as (code, p0, p1), see _policy_spec.
+    """
+    if code == BASE_STOCK:
+        return base_stock_rule(inventory, capacity, pending, p0)
+    if code == MIN_MAX:
+        return min_max_rule(inventory, capacity, pending, p0, p1)
+    return fixed_order_rule(inventory, capacity, pending, p0)
+
+
+@njit(cache=True)
+def episode_kernel(
+    inv, back, cap, sub, req, has_sub, policy,
+    sub_demand, ext_demand, lead_times,
+    pipe, sub_log, raw_log,
+):
+    """
+    Whole episode for K raw nodes and an optional subassembly.
+    inv, back = (K,) raw node inventory/backorders, updated in place
+    sub = [inventory, backorders] of the subassembly, updated in place
+    policy = (K, 3) rows of (code, p0, p1), see _policy_spec
+    pipe = (K, L) ring buffer of pending orders: slot (t + lead_time) % L
+        holds what arrives at t + lead_time, L = max lead time
+    sub_log = (T, 3) output rows of [assemblies, inventory, backorders]
+    raw_log = (T, K, 6) output rows of [inventory before, backorders before,
+        total demand, inventory after, backorders after, order]
+    """
+    horizon, n_raw = ext_demand.shape
+    n_slots = pipe.shape[1]
+
+    # Total quantity in transit per node, kept up to date on receipt and order
+    pending = np.zeros(n_raw, dtype=np.int64)
+    for i in range(n_raw):
+        pending[i] = pipe[i].sum()
+
+    head = 0  # slot of the current period
+    for t in range(horizon):
+        # Step 1) Receive the orders due this period
+        for i in range(n_raw):
+            inv[i] += pipe[i, head]
+            pending[i] -= pipe[i, head]
+            pipe[i, head] = 0
+
+        # Step 2) Subassembly pulls its parts (assumes backordering is allowed, no partial fulfillment or allocation)
+        final_demand = sub_demand[t]
+        assemblies = 0
+        if has_sub:
+            # No lead time because this is not too relevant for this example. Assumes immediate assembly.
+            # Assemblies are the min of received // req over the parts, taken
+            # as the parts come in (received // req never exceeds final_demand)
+            assemblies = final_demand
+            for i in range(n_raw):
+                requested = final_demand * req[i]
+                received = min(requested, inv[i])
+                inv[i] -= received
+                back[i] += requested - received
+                assemblies = min(assemblies, received // req[i])
+
+            fulfilled = min(sub[1], assemblies)
+            sub[1] -= fulfilled
+            sub[0] += assemblies - fulfilled
+
+        sub_log[t, 0] = assemblies
+        sub_log[t, 1] = sub[0]
+        sub_log[t, 2] = sub[1]
+
+        # Step 3) Raw material demand (derived plus external) and ordering
+        for i in range(n_raw):
+            raw_log[t, i, 0] = inv[i]
+            raw_log[t, i, 1] = back[i]
+            total_demand = final_demand * req[i] + ext_demand[t, i]
 
+            # Fulfill backorders first
+            fulfill = min(inv[i], back[i])
+            inv[i] -= fulfill
+            back[i] -= fulfill
 
-# Helper function to simulate an episode
-
-def advance_time(pending_orders):
-    arrived = 0
-    new_pending = []
-
-    for qty, lt in pending_orders:
-        if lt <= 1:
-            arrived += qty
-        else:
-            new_pending.append((qty, lt - 1))
+            # Fulfill new demand, the rest is backordered
+            sold = min(inv[i], total_demand)
+            inv[i] -= sold
+            back[i] += total_demand - sold
 
-    return arrived, new_pending
+            # Ordering decision (uses inventory position)
+            order = order_quantity(
+                policy[i, 0], policy[i, 1], policy[i, 2], inv[i], cap[i], pending[i]
+            )
+            if order > 0:
+                pipe[i, (head + lead_times[t, i]) % n_slots] += order
+                pending[i] += order
+
+            raw_log[t, i, 2] = total_demand
+            raw_log[t, i, 3] = inv[i]
+            raw_log[t, i, 4] = back[i]
+            raw_log[t, i, 5] = order
+
+        head = (head + 1) % n_slots
+
+
+@njit(parallel=True, nogil=True, cache=True)
+def run_batch(
+    inv, back, cap, sub, req, has_sub, policy,
+    sub_demand, ext_demand, lead_times,
+    pipe, sub_log, raw_log,
+):
+    """
+    episode_kernel for N independent paths, spread over threads.
+    Every argument except the shared cap, req, has_sub and policy has a
+    leading path axis; path n only touches row n, so no locking is needed.
+    Randomness is drawn by the caller, the kernel itself is deterministic.
+    """
+    for n in prange(inv.shape[0]):
+        episode_kernel(
+            inv[n], back[n], cap, sub[n], req, has_sub, policy,
+            sub_demand[n], ext_demand[n], lead_times[n],
+            pipe[n], sub_log[n], raw_log[n],
+        )
+
+
+@dataclass
+class SimulationContext:
+    """
+    Per-network data that does not change between episodes: the node
+    partition, the assembly requirement and the random stream. Build it
+    once and pass it to simulate_episode for repeated (Monte Carlo) runs.
+    """
+    nodes: List[Node]
+    raw_idx: np.ndarray  # rows of the raw nodes in NodeArray.from_nodes(nodes)
+    sub_idx: Optional[int]  # row of the subassembly, if any
+    sub_node: Optional[Node]
+    raw_nodes: List[Node]
+    req: np.ndarray  # parts of each raw node per assembly
+    rng: Generator
+
+    @classmethod
+    def from_nodes(
+        cls,
+        nodes: list,
+        assembly_requirement: list[int] = None,
+        rng: Optional[Generator] = None,
+    ) -> "SimulationContext":
+        if assembly_requirement is None:
+            assembly_requirement = [1, 1, 1]
+
+        type_code = np.array([n.type_code for n in nodes], dtype=np.int8)
+        raw_idx = np.where(type_code == NodeType.RAW)[0]
+        sub_rows = np.where(type_code == NodeType.SUBASSEMBLY)[0]
+        sub_idx = int(sub_rows[0]) if len(sub_rows) else None
+
+        sub_node = nodes[sub_idx] if sub_idx is not None else None
+        raw_nodes = [nodes[i] for i in raw_idx]
+
+        req = np.array(assembly_requirement[:len(raw_nodes)], dtype=np.int64)
+        assert len(req) == len(raw_nodes), "Need one assembly requirement per raw node."
+
+        return cls(
+            nodes=list(nodes),
+            raw_idx=raw_idx,
+            sub_idx=sub_idx,
+            sub_node=sub_node,
+            raw_nodes=raw_nodes,
+            req=req,
+            rng=rng if rng is not None else np.random.default_rng(),
+        )
+
+    def initial_state(self, n_paths: int, horizon: int) -> "EpisodeInputs":
+        """
+        Start state, policy spec and random draws for `n_paths` episodes of
+        `horizon` periods. Every engine draws through here, so they all use
+        the random stream the same way.
+        """
+        n_raw = len(self.raw_nodes)
+        arr = NodeArray.from_nodes(self.nodes)
+        raw_idx, sub_idx = self.raw_idx, self.sub_idx
+
+        sub = np.array(
+            [arr.inventory[sub_idx], arr.backorders[sub_idx]] if self.sub_node else [0, 0],
+            dtype=np.int64,
+        )
+
+        # All randomness for every path, drawn up front in one call per stream
+        rng = self.rng
+        sub_demand = (
+            rng.poisson(lam=5, size=(horizon, n_paths))
+            if self.sub_node
+            else np.zeros((horizon, n_paths), dtype=np.int64)
+        )
+        ext_demand = rng.poisson(lam=2, size=(horizon, n_paths, n_raw))
+        lead_times = rng.integers(1, MAX_LEAD_TIME + 1, size=(horizon, n_paths, n_raw))
+
+        return EpisodeInputs(
+            arr=arr,
+            cap=arr.capacity[raw_idx],
+            policy=np.array(
+                [_policy_spec(n.policy) for n in self.raw_nodes], dtype=np.int64,
+            ).reshape(n_raw, 3),
+            inv=np.tile(arr.inventory[raw_idx], (n_paths, 1)),
+            back=np.tile(arr.backorders[raw_idx], (n_paths, 1)),
+            sub=np.tile(sub, (n_paths, 1)),
+            sub_demand=sub_demand,
+            ext_demand=ext_demand,
+            lead_times=lead_times,
+        )
+
+
+@dataclass
+class EpisodeInputs:
+    """
+    Everything an engine needs to run N paths over T periods. State rows
+    are per path: inv and back are (N, K), sub is (N, 2) inventory and
+    backorders. Draws are period-major: (T, N) and (T, N, K).
+    """
+    arr: NodeArray  # the nodes' current state as columns
+    cap: np.ndarray
+    policy: np.ndarray  # (K, 3) rows of _policy_spec
+    inv: np.ndarray
+    back: np.ndarray
+    sub: np.ndarray
+    sub_demand: np.ndarray
+    ext_demand: np.ndarray
+    lead_times: np.ndarray
 
 
 def simulate_episode(
     nodes: list,
     horizon: int = 5,
-    assembly_requirement: list[int] = None
+    assembly_requirement: list[int] = None,
+    verbose: bool = False,
+    context: Optional[SimulationContext] = None,
 ) -> None:
+    """
+    Simulate one episode. Pass a prebuilt `context` to skip partitioning
+    `nodes` again; `nodes` and `assembly_requirement` are then ignored.
+    With `verbose`, a step-by-step trace is logged at DEBUG level.
+    """
+
+    if context is None:
+        context = SimulationContext.from_nodes(nodes, assembly_requirement)
+
+    sub_node, raw_nodes, req = context.sub_node, context.raw_nodes, context.req
+    raw_idx, sub_idx = context.raw_idx, context.sub_idx
+    n_raw = len(raw_nodes)
+
+    # A batch of one path; the kernel works on that path's rows
+    start = context.initial_state(1, horizon)
+    arr, cap, policy = start.arr, start.cap, start.policy
+    inv, back, sub = start.inv[0], start.back[0], start.sub[0]
+    sub_demand = np.ascontiguousarray(start.sub_demand[:, 0])
+    ext_demand = np.ascontiguousarray(start.ext_demand[:, 0])
+    lead_times = np.ascontiguousarray(start.lead_times[:, 0])
+
+    # Pending orders per raw node (the only nodes that order), as a ring
+    # buffer over the next MAX_LEAD_TIME periods
+    pipe = np.zeros((n_raw, MAX_LEAD_TIME), dtype=np.int64)
+
+    sub_log = np.empty((horizon, 3), dtype=np.int64)
+    raw_log = np.empty((horizon, n_raw, 6), dtype=np.int64)
+
+    episode_kernel(
+        inv, back, cap, sub, req, sub_node is not None, policy,
+        sub_demand, ext_demand, lead_times,
+        pipe, sub_log, raw_log,
+    )
 
-    if assembly_requirement is None:
-        assembly_requirement = [1, 1, 1]
-
-    sub_node = next((n for n in nodes if n.type == "SubAssembly"), None)
-    raw_nodes = [n for n in nodes if n.type == "Raw Material"]
-
-    # Pending orders per node: (quantity, remaining_lead_time)
-    node_orders = {node.id: [] for node in nodes}
-
-    print("\n=====================================")
-    print("Starting Episode Simulation")
-    print("=====================================\n")
+    # Sync the nodes with the end-of-episode state
+    if horizon > 0:
+        arr.set_state(raw_idx, inv, back, 0, StateCategory.FINAL)
+        if sub_node:
+            arr.inventory[sub_idx], arr.backorders[sub_idx] = sub
+        arr.write_back(context.nodes)
+
+    # Skip building the trace unless someone will see it
+    if not (verbose and logger.isEnabledFor(logging.DEBUG)):
+        return
+
+    # Trace, rebuilt from the kernel logs and logged as one record
+    out = [
+        "\n=====================================",
+        "Starting Episode Simulation",
+        "=====================================\n",
+    ]
 
     for t in range(horizon):
-        print(f"\n--- Time Step {t} ---")
-        print("----------------------")
-
-        # =========================================================
-        # Step 1) Orders arrive (lead time advances ONCE per period)
-        # =========================================================
-        for node in nodes:
-            arrived, updated_orders = advance_time(node_orders[node.id])
-            node.inventory += arrived
-            node_orders[node.id] = updated_orders
-
-        # =========================================================
-        # Step 2) Subassembly demand and production
-        # =========================================================
-        if sub_node:
-            final_demand = np.random.poisson(lam=5)
+        out += [f"\n--- Time Step {t} ---", "----------------------"]
 
-            part_demand = [
-                final_demand * qty for qty in assembly_requirement
+        if sub_node:
+            out += [
+                f"\nSubAssembly {sub_node.name}",
+                f"Final demand: {sub_demand[t]}",
+                f"Assemblies produced: {sub_log[t, 0]}",
+                f"Inventory: {sub_log[t, 1]}, Backorders: {sub_log[t, 2]}",
             ]
 
-            received_parts = []
-
-            for i, raw_node in enumerate(raw_nodes): # assumes backordering is allowed, no partial fulfillment or allocation
-                requested = part_demand[i]
-                supplied = min(requested, raw_node.inventory)
-                raw_node.inventory -= supplied
-                raw_node.backorders += requested - supplied
-                received_parts.append(supplied)
-
-            assemblies_possible = min(
-                received_parts[i] // assembly_requirement[i]
-                for i in range(len(raw_nodes))
-            ) # No lead time because this is not too relevant for this example. Assumes immediate assembly.
+        for i, raw_node in enumerate(raw_nodes):
+            inv_before, back_before, total_demand, inv_after, back_after, order = raw_log[t, i]
+            out += [
+                f"\nNode {raw_node.name} (Raw Material)",
+                f"Before demand | Inventory: {inv_before}, Backorders: {back_before}",
+                f"Total demand: {total_demand}",
+                f"After demand | Inventory: {inv_after}, Backorders: {back_after}",
+                f"Order placed: {order}",
+            ]
 
-            fulfilled = min(sub_node.backorders, assemblies_possible)
-            sub_node.backorders -= fulfilled
-            sub_node.inventory += assemblies_possible - fulfilled
+        out.append("\n----------------------")
 
+    out += [
+        "\n=====================================",
+        "Episode simulation completed.",
+        "=====================================",
+    ]
+    logger.debug("\n".join(out))
+
+
+def _policy_spec(policy) -> tuple[int, int, int]:
+    """
+    (code, p0, p1) describing a policy's order rule as plain integers:
+    code = PolicyType value, p0, p1 = its kernel_params (zero padded).
+    """
+    if policy.policy_type not in POLICY_KERNELS:
+        raise TypeError(f"No vectorized order rule for {type(policy).__name__}")
+    return (policy.policy_type.value, *policy.kernel_params(), 0, 0)[:3]
+
+
+def _policy_groups(policies: list) -> list[tuple]:
+    """
+    (kernel, columns, params) per policy type present in `policies`, so a
+    batched engine calls each rule once on just the nodes that use it.
+    params holds one array per kernel parameter, aligned with columns.
+    """
+    columns = {}
+    for k, policy in enumerate(policies):
+        if policy.policy_type not in POLICY_KERNELS:
+            raise TypeError(f"No vectorized order rule for {type(policy).__name__}")
+        columns.setdefault(policy.policy_type, []).append(k)
+
+    groups = []
+    for policy_type, cols in columns.items():
+        params = np.array([policies[k].kernel_params() for k in cols], dtype=np.int64)
+        groups.append((POLICY_KERNELS[policy_type], np.array(cols), list(params.T)))
+    return groups
+
+
+@dataclass
+class EpisodeBatch:
+    """
+    End-of-period state of N simulated paths over T periods.
+    Raw node arrays are (N, K, T); subassembly arrays are (N, T).
+    """
+    inventory: np.ndarray
+    backorders: np.ndarray
+    orders: np.ndarray
+    sub_inventory: np.ndarray
+    sub_backorders: np.ndarray
+
+
+def simulate_episodes_vec(
+    n_paths: int,
+    nodes: list,
+    horizon: int = 5,
+    assembly_requirement: list[int] = None,
+    context: Optional[SimulationContext] = None,
+) -> EpisodeBatch:
+    """
+    Monte Carlo version of simulate_episode: runs `n_paths` independent
+    episodes at once, broadcasting the per-node logic over (N, K) arrays.
+    All paths start from the nodes' current state; the nodes are not modified.
+    """
+
+    if context is None:
+        context = SimulationContext.from_nodes(nodes, assembly_requirement)
+
+    sub_node, raw_nodes, req = context.sub_node, context.raw_nodes, context.req
+    n_raw = len(raw_nodes)
+
+    # Current state, one row per path; per raw node constants broadcast against it
+    start = context.initial_state(n_paths, horizon)
+    cap, inv, bo = start.cap, start.inv, start.back
+    sub_inv = start.sub[:, 0].copy()
+    sub_bo = start.sub[:, 1].copy()
+    sub_demand, ext_demand, lead_times = start.sub_demand, start.ext_demand, start.lead_times
+    policy_groups = _policy_groups([n.policy for n in raw_nodes])
+
+    # Pipeline ring buffer: slot (t + lead_time) % MAX_LEAD_TIME receives at t + lead_time
+    pipe = np.zeros((n_paths, n_raw, MAX_LEAD_TIME), dtype=np.int64)
+    path_idx, node_idx = np.indices((n_paths, n_raw))
+
+    batch = EpisodeBatch(
+        inventory=np.empty((n_paths, n_raw, horizon), dtype=np.int32),
+        backorders=np.empty((n_paths, n_raw, horizon), dtype=np.int32),
+        orders=np.empty((n_paths, n_raw, horizon), dtype=np.int32),
+        sub_inventory=np.empty((n_paths, horizon), dtype=np.int32),
+        sub_backorders=np.empty((n_paths, horizon), dtype=np.int32),
+    )
 
-            print(f"\nSubAssembly {sub_node.name}")
-            print(f"Final demand: {final_demand}")
-            print(f"Assemblies produced: {assemblies_possible}")
-            print(f"Inventory: {sub_node.inventory}, Backorders: {sub_node.backorders}")
+    for t in range(horizon):
+        head = t % MAX_LEAD_TIME
 
-        # =========================================================
-        # Step 3) Raw material demand, ordering, and state update
-        # ========================================================
-        for i, raw_node in enumerate(raw_nodes):
-            print(f"\nNode {raw_node.name} (Raw Material)")
-            print(f"Before demand | Inventory: {raw_node.inventory}, Backorders: {raw_node.backorders}")
+        # Step 1) Orders due this period arrive
+        inv += pipe[:, :, head]
+        pipe[:, :, head] = 0
 
-            # Demand comes from subassembly(s)
-            demand_from_sub = final_demand * assembly_requirement[i]
+        # Step 2) Subassembly demand and production
+        final_demand = sub_demand[t]
+        if sub_node:
+            requested = final_demand[:, None] * req
+            received = np.minimum(requested, inv)
+            inv -= received
+            bo += requested - received
 
-            # Optional: add external demand
-            external_demand = np.random.poisson(lam=2)  # adjust or remove if not needed
-            total_demand = demand_from_sub + external_demand
+            assemblies = (received // req).min(axis=1)
+            fulfilled = np.minimum(sub_bo, assemblies)
+            sub_bo -= fulfilled
+            sub_inv += assemblies - fulfilled
 
-            # Fulfill backorders first
-            fulfill = min(raw_node.inventory, raw_node.backorders)
-            raw_node.inventory -= fulfill
-            raw_node.backorders -= fulfill
+        # Step 3) Raw material demand: derived plus external
+        total_demand = final_demand[:, None] * req + ext_demand[t]
 
-            # Fulfill new demand
-            if total_demand <= raw_node.inventory:
-                raw_node.inventory -= total_demand
-            else:
-                raw_node.backorders += total_demand - raw_node.inventory
-                raw_node.inventory = 0
+        fulfill = np.minimum(inv, bo)
+        inv -= fulfill
+        bo -= fulfill
 
+        sold = np.minimum(inv, total_demand)
+        inv -= sold
+        bo += total_demand - sold
 
-            print(f"Total demand: {total_demand}")
-            print(f"After demand | Inventory: {raw_node.inventory}, Backorders: {raw_node.backorders}")
+        # Ordering decision, one batched rule call per policy type
+        pending = pipe.sum(axis=2)
+        order = np.empty_like(inv)
+        for kernel, cols, params in policy_groups:
+            order[:, cols] = kernel(inv[:, cols], cap[cols], pending[:, cols], *params)
 
-            # Ordering decision (uses inventory position)
-            
-            pending_orders = node_orders[raw_node.id]
-            order_quantity = raw_node.policy.decide_order_quantity(pending_orders)
-
-            print(f"Order placed: {order_quantity}")
-
-            if order_quantity > 0:
-                lead_time = np.random.randint(1, 4)
-                pending_orders.append((order_quantity, lead_time))
-
-            # Update node state
-            remaining_time = horizon - t - 1
-            category = (
-                StateCategory.AWAIT_EVENT
-                if remaining_time > 0
-                else StateCategory.FINAL
-            )
+        slot = (head + lead_times[t]) % MAX_LEAD_TIME
+        pipe[path_idx, node_idx, slot] += np.maximum(order, 0)
 
-            raw_node.set_state(
-                inventory=raw_node.inventory,
-                backorders=raw_node.backorders,
-                remaining_time=remaining_time,
-                category=category
-            )
+        batch.inventory[:, :, t] = inv
+        batch.backorders[:, :, t] = bo
+        batch.orders[:, :, t] = order
+        batch.sub_inventory[:, t] = sub_inv
+        batch.sub_backorders[:, t] = sub_bo
 
-        print("\n----------------------")
+    return batch
 
-    print("\n=====================================")
-    print("Episode simulation completed.")
-    print("=====================================")
 
+def simulate_episodes_parallel(
+    n_paths: int,
+    nodes: list,
+    horizon: int = 5,
+    assembly_requirement: list[int] = None,
+    context: Optional[SimulationContext] = None,
+) -> EpisodeBatch:
+    """
+    simulate_episodes_vec on the compiled kernel, one path per thread.
+    Draws the same random streams, so both give the same batch for the same
+    generator state. The nodes are not modified.
+    """
+
+    if context is None:
+        context = SimulationContext.from_nodes(nodes, assembly_requirement)
+
+    sub_node, raw_nodes, req = context.sub_node, context.raw_nodes, context.req
+    n_raw = len(raw_nodes)
+
+    start = context.initial_state(n_paths, horizon)
+    cap, policy, inv, back, sub = start.cap, start.policy, start.inv, start.back, start.sub
+    pipe = np.zeros((n_paths, n_raw, MAX_LEAD_TIME), dtype=np.int64)
+
+    # Same draws as simulate_episodes_vec, made path-major so each thread
+    # reads contiguous rows
+    sub_demand = np.ascontiguousarray(start.sub_demand.T)
+    ext_demand = np.ascontiguousarray(start.ext_demand.transpose(1, 0, 2))
+    lead_times = np.ascontiguousarray(start.lead_times.transpose(1, 0, 2))
+
+    sub_log = np.empty((n_paths, horizon, 3), dtype=np.int64)
+    raw_log = np.empty((n_paths, horizon, n_raw, 6), dtype=np.int64)
+
+    run_batch(
+        inv, back, cap, sub, req, sub_node is not None, policy,
+        sub_demand, ext_demand, lead_times,
+        pipe, sub_log, raw_log,
+    )
 
+    # raw_log columns 3..5 are the end-of-period inventory, backorders and order
+    raw_log = raw_log.transpose(0, 2, 3, 1)
+    return EpisodeBatch(
+        inventory=raw_log[:, :, 3].astype(np.int32),
+        backorders=raw_log[:, :, 4].astype(np.int32),
+        orders=raw_log[:, :, 5].astype(np.int32),
+        sub_inventory=sub_log[:, :, 1].astype(np.int32),
+        sub_backorders=sub_log[:, :, 2].astype(np.int32),
+    )
 
 
 # Helper functions 
 
-def get_random_id(rng: Generator, low: int = 1, high: int = 1000) -> int:
-    return rng.integers(low=low, high=high)
+def get_random_ids(rng: Generator, n: int, low: int = 1, high: int = 1000) -> list[int]:
+    return rng.integers(low=low, high=high, size=n).tolist()
 
 def main() -> None:
 
     print("Node MDP State Management Example")
 
+    rng = rnd.default_rng()  # one stream for the ids and the simulation
+    ids = get_random_ids(rng, 4)
+
     node_1 = Node(
-        id=get_random_id(rnd.default_rng()),
+        id=ids[0],
         name="Node_A",
         capacity=100,
         type="Raw Material",
@@ -185,7 +553,7 @@ def main() -> None:
     )
 
     node_2 = Node(
-        id=get_random_id(rnd.default_rng()),
+        id=ids[1],
         name="Node_B",
         capacity=150,
         type="Raw Material",
@@ -206,7 +574,7 @@ def main() -> None:
     )
 
     node_3 = Node(
-        id=get_random_id(rnd.default_rng()),
+        id=ids[2],
         name="Node_C",
         capacity=200,
         type="Raw Material",
@@ -226,7 +594,7 @@ def main() -> None:
     )
 
     node_4 = Node(
-        id=get_random_id(rnd.default_rng()),
+        id=ids[3],
         name="Node_D",
         capacity=250,
         type="SubAssembly",
@@ -262,10 +630,14 @@ def main() -> None:
 
     requirement = [2, 1, 3]  
 
+    # Show the episode trace on stdout
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    logger.setLevel(logging.DEBUG)
 
     create_graph_window(nodes, connections, title="Supply Chain Network")
 
-    simulate_episode(nodes, horizon=5, assembly_requirement=requirement)
+    context = SimulationContext.from_nodes(nodes, requirement, rng=rng)
+    simulate_episode(nodes, horizon=5, verbose=True, context=context)
 
 
 if __name__ == "__main__":
@@ -1,27 +1,45 @@
-from dataclasses import dataclass, field
-from enum import Enum, auto
+from dataclasses import dataclass
+from enum import Enum, IntEnum
+from model_types import StateCategory
+from operator import attrgetter
 from typing import Optional
 from numpy.random import Generator
+import numpy as np
 
-class StateCategory(Enum):
-    AWAIT_EVENT = auto()
-    AWAIT_ACTION = auto()
-    FINAL = auto()
+_VALIDATE = __debug__  # state checks are skipped under python -O
 
+class NodeType(IntEnum):
+    RAW = 0
+    SUBASSEMBLY = 1
 
-@dataclass
+
+NODE_TYPES = {"Raw Material": NodeType.RAW, "SubAssembly": NodeType.SUBASSEMBLY}  # Node.type -> type_code
+
+
+def _read_only(name: str) -> property:
+    """
+    Read-only access to the private slot `_<name>`, which Node.__init__ sets once.
+    """
+    def fset(self, value):
+        raise AttributeError(f"{name} is read-only and cannot be modified after initialization")
+
+    return property(attrgetter("_" + name), fset)
+
+
+@dataclass(slots=True, init=False, repr=False)
 class Node:
 
-    # static configuration
+    # static configuration (private slots, exposed read-only below)
     # ------------
-    id: int = field(init=True, repr=True)
-    name: str = field(init=True, repr=True)
-    capacity: int = field(init=True, repr=True)
-    type: str = field(init=True, repr=True)
-    holding_cost: float = field(init=True, repr=True)
-    upstream_ids: list[int] = field(init=True, repr=False)
-    downstream_ids: list[int] = field(init=True, repr=False)
-    policy: Enum = field(init=True, repr=False)
+    _id: int
+    _name: str
+    _capacity: int
+    _type: str
+    _type_code: NodeType  # derived from `type`
+    _upstream_ids: list[int]
+    _downstream_ids: list[int]
+    holding_cost: float
+    policy: Enum
     # ------------
 
     # Dynamic state 
@@ -29,24 +47,70 @@ class Node:
     inventory: int
     backorders: int
     remaining_time: int
-    category: StateCategory = StateCategory.AWAIT_EVENT
+    category: StateCategory
     # ------------
-    
+
+    id = _read_only("id")
+    name = _read_only("name")
+    capacity = _read_only("capacity")
+    type = _read_only("type")
+    type_code = _read_only("type_code")
+    upstream_ids = _read_only("upstream_ids")
+    downstream_ids = _read_only("downstream_ids")
+
     # Methods
     # ------------
-    def __post_init__(self) -> None:
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        capacity: int,
+        type: str,
+        holding_cost: float,
+        upstream_ids: list[int],
+        downstream_ids: list[int],
+        policy: Enum,
+        inventory: int,
+        backorders: int,
+        remaining_time: int,
+        category: StateCategory = StateCategory.AWAIT_EVENT,
+    ) -> None:
         """
-        Validate initial state.
+        Set the configuration and validate the initial state.
         """
-        assert 0 <= self.inventory <= self.capacity
-        assert self.backorders >= 0
-        assert self.remaining_time >= 0
+        if type not in NODE_TYPES:
+            raise ValueError(f"Unknown node type {type!r}, expected one of {list(NODE_TYPES)}")
+
+        self._id = id
+        self._name = name
+        self._capacity = capacity
+        self._type = type
+        self._type_code = NODE_TYPES[type]
+        self._upstream_ids = upstream_ids
+        self._downstream_ids = downstream_ids
+        self.holding_cost = holding_cost
+        self.policy = policy
 
-    # Prevent modification of static fields
-    def __setattr__(self, name, value):
-        if hasattr(self, name) and name in ("id", "capacity", "type", "upstream_ids", "downstream_ids", "name"):
-            raise AttributeError(f"{name} is read-only and cannot be modified after initialization")
-        super().__setattr__(name, value)
+        self.inventory = inventory
+        self.backorders = backorders
+        self.remaining_time = remaining_time
+        self.category = category
+
+        if _VALIDATE:
+            self._check(inventory, backorders, remaining_time)
+
+    def __repr__(self) -> str:
+        return (
+            f"Node(id={self._id!r}, name={self._name!r}, capacity={self._capacity!r}, "
+            f"type={self._type!r}, holding_cost={self.holding_cost!r}, inventory={self.inventory!r}, "
+            f"backorders={self.backorders!r}, remaining_time={self.remaining_time!r}, "
+            f"category={self.category!r})"
+        )
+
+    def _check(self, inventory: int, backorders: int, remaining_time: int) -> None:
+        assert 0 <= inventory <= self.capacity
+        assert backorders >= 0
+        assert remaining_time >= 0
 
     def set_state(
         self,
@@ -58,9 +122,8 @@ class Node:
         """
         Update the node MDP state.
         """
-        assert 0 <= inventory <= self.capacity
-        assert backorders >= 0
-        assert remaining_time >= 0
+        if _VALIDATE:
+            self._check(inventory, backorders, remaining_time)
 
         self.inventory = inventory
         self.backorders = backorders
@@ -121,3 +184,69 @@ class Node:
         return cost
 
 
+# Struct-of-arrays view
+# -------------------------------
+@dataclass
+class NodeArray:
+    """
+    Columns of a list of nodes, row i of every column is nodes[i].
+    Integer columns are int64 so the compiled kernels use them directly.
+    """
+
+    ids: np.ndarray
+    names: list[str]
+    capacity: np.ndarray
+    inventory: np.ndarray
+    backorders: np.ndarray
+    remaining_time: np.ndarray
+    holding_cost: np.ndarray
+    type_code: np.ndarray  # NodeType values
+    category: np.ndarray  # StateCategory values
+
+    @classmethod
+    def from_nodes(cls, nodes: list[Node]) -> "NodeArray":
+        return cls(
+            ids=np.array([n.id for n in nodes], dtype=np.int64),
+            names=[n.name for n in nodes],
+            capacity=np.array([n.capacity for n in nodes], dtype=np.int64),
+            inventory=np.array([n.inventory for n in nodes], dtype=np.int64),
+            backorders=np.array([n.backorders for n in nodes], dtype=np.int64),
+            remaining_time=np.array([n.remaining_time for n in nodes], dtype=np.int64),
+            holding_cost=np.array([n.holding_cost for n in nodes], dtype=np.float64),
+            type_code=np.array([n.type_code for n in nodes], dtype=np.int8),
+            category=np.array([n.category.value for n in nodes], dtype=np.int8),
+        )
+
+    def set_state(self, i, inventory, backorders, remaining_time, category: StateCategory) -> None:
+        """
+        Update the state of row(s) i; same checks as Node.set_state.
+        """
+        if _VALIDATE:
+            self._check(i, inventory, backorders, remaining_time)
+
+        self.inventory[i] = inventory
+        self.backorders[i] = backorders
+        self.remaining_time[i] = remaining_time
+        self.category[i] = category.value
+
+    def _check(self, i, inventory, backorders, remaining_time) -> None:
+        assert np.all((0 <= inventory) & (inventory <= self.capacity[i]))
+        assert np.all(backorders >= 0)
+        assert np.all(remaining_time >= 0)
+
+    def write_back(self, nodes: list[Node]) -> None:
+        """
+        Copy the state columns back onto `nodes` (the list this was built from).
+        Subassembly inventory is not capacity-bound, so it is assigned directly.
+        """
+        for i, node in enumerate(nodes):
+            if self.type_code[i] == NodeType.SUBASSEMBLY:
+                node.inventory = int(self.inventory[i])
+                node.backorders = int(self.backorders[i])
+            else:
+                node.set_state(
+                    inventory=int(self.inventory[i]),
+                    backorders=int(self.backorders[i]),
+                    remaining_time=int(self.remaining_time[i]),
+                    category=StateCategory(int(self.category[i])),
+                )
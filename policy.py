@@ -1,29 +1,117 @@
 # policy.py
-from dataclasses import dataclass, field
+from dataclasses import dataclass
+from model_types import PolicyType
 from node import Node
+from numba import njit, vectorize
 import numpy as np
-from typing import List, Tuple
+from typing import Callable, ClassVar, List, Optional, Tuple
 
 
-@dataclass
+# Order rules
+# ------------
+# Scalar cores shared by the policy classes and the compiled episode kernel,
+# plus ufuncs that apply them elementwise over (N, K) arrays of states.
+
+@njit(cache=True)
+def base_stock_rule(inventory, capacity, pending, base_stock_level):
+    headroom = capacity - inventory
+    order_quantity = max(0, base_stock_level - (inventory + pending))
+    return min(order_quantity, headroom)
+
+
+@njit(cache=True)
+def min_max_rule(inventory, capacity, pending, min_inventory, max_inventory):
+    inventory_position = inventory + pending
+    if inventory_position >= max_inventory or inventory_position >= min_inventory:
+        return 0
+    return min(max_inventory - inventory_position, capacity - inventory_position)
+
+
+@njit(cache=True)
+def fixed_order_rule(inventory, capacity, pending, order_quantity):
+    available_capacity = capacity - (inventory + pending)
+    return min(order_quantity, max(0, available_capacity))
+
+
+@vectorize(["int64(int64, int64, int64, int64)"], cache=True)
+def base_stock_order(inventory, capacity, pending, base_stock_level):
+    return base_stock_rule(inventory, capacity, pending, base_stock_level)
+
+
+@vectorize(["int64(int64, int64, int64, int64, int64)"], cache=True)
+def min_max_order(inventory, capacity, pending, min_inventory, max_inventory):
+    return min_max_rule(inventory, capacity, pending, min_inventory, max_inventory)
+
+
+@vectorize(["int64(int64, int64, int64, int64)"], cache=True)
+def fixed_order(inventory, capacity, pending, order_quantity):
+    return fixed_order_rule(inventory, capacity, pending, order_quantity)
+
+
+# Batched order rule per policy type, called as
+# POLICY_KERNELS[policy.policy_type](inventory, capacity, pending, *policy.kernel_params())
+POLICY_KERNELS: dict[PolicyType, Callable] = {
+    PolicyType.BASE_STOCK: base_stock_order,
+    PolicyType.MIN_MAX: min_max_order,
+    PolicyType.FIXED_ORDER: fixed_order,
+}
+
+
+# Evaluation
+# ------------
+
+@njit(cache=True)
+def profit_rule(inventory, backorders, holding_cost, price_per_unit, demand):
+    sales = min(inventory, demand)
+    revenue = sales * price_per_unit
+    inventory_cost = (inventory - sales) * holding_cost
+    backorder_cost = backorders * holding_cost
+    return revenue - inventory_cost - backorder_cost
+
+
+@vectorize(["float64(int64, int64, float64, float64, int64)"], cache=True)
+def evaluate_batch(inventory, backorders, holding_cost, price_per_unit, demand):
+    return profit_rule(inventory, backorders, holding_cost, price_per_unit, demand)
+
+
+@dataclass(slots=True)
 class BasePolicy:
     """
     Abstract base class for inventory policies.
     All policies should inherit from this.
     """
     node: Node
+    policy_type: ClassVar[Optional[PolicyType]] = None  # key into POLICY_KERNELS
+
+    def kernel_params(self) -> Tuple[int, ...]:
+        """
+        Integer parameters of the policy's order rule, after (inventory, capacity, pending).
+        """
+        raise NotImplementedError
 
     def decide_order_quantity(self, pending_orders: List[Tuple[int, int]]) -> int:
+        return self.decide_order_quantity_fast(sum(qty for qty, _ in pending_orders))
+
+    def decide_order_quantity_fast(self, total_pending: int) -> int:
+        """
+        Same as decide_order_quantity, given the total quantity already on order.
+        """
         raise NotImplementedError
 
     def evaluate(self, state: Node, demand_lambda: float = 5.0) -> float:
-        raise NotImplementedError
+        """
+        One-period profit of `state` under a Poisson(demand_lambda) demand draw.
+        """
+        expected_demand = np.random.poisson(lam=demand_lambda)
+        return float(profit_rule(
+            state.inventory, state.backorders, state.holding_cost, self.price_per_unit, expected_demand
+        ))
 
     def set_parameters(self, **kwargs):
         raise NotImplementedError
 
 
-@dataclass
+@dataclass(slots=True)
 class BaseStockPolicy(BasePolicy):
     """
     Base-stock policy with safety stock.
@@ -32,6 +120,7 @@ class BaseStockPolicy(BasePolicy):
     target_inventory: int = 50
     safety_stock: int = 10
     price_per_unit: float = 20.0
+    policy_type: ClassVar[PolicyType] = PolicyType.BASE_STOCK
 
     def set_parameters(self, target_inventory: int = None, safety_stock: int = None, price_per_unit: float = None):
         if target_inventory is not None:
@@ -41,22 +130,15 @@ class BaseStockPolicy(BasePolicy):
         if price_per_unit is not None:
             self.price_per_unit = price_per_unit
 
-    def decide_order_quantity(self, pending_orders: List[Tuple[int, int]]) -> int:
-        total_pending = sum(qty for qty, _ in pending_orders)
-        base_stock_level = self.target_inventory + self.safety_stock
-        order_quantity = max(0, base_stock_level - (self.node.inventory + total_pending))
-        return min(order_quantity, self.node.capacity - self.node.inventory)
+    def kernel_params(self) -> Tuple[int]:
+        return (self.target_inventory + self.safety_stock,)
 
-    def evaluate(self, state: Node, demand_lambda: float = 5.0) -> float:
-        expected_demand = np.random.poisson(lam=demand_lambda)
-        sales = min(state.inventory, expected_demand)
-        revenue = sales * self.price_per_unit
-        holding_cost = (state.inventory - sales) * state.h
-        backorder_cost = state.backorders * state.h
-        return revenue - holding_cost - backorder_cost
+    def decide_order_quantity_fast(self, total_pending: int) -> int:
+        return int(base_stock_rule(self.node.inventory, self.node.capacity, total_pending,
+                                   self.target_inventory + self.safety_stock))
 
 
-@dataclass
+@dataclass(slots=True)
 class MinMaxPolicy(BasePolicy):
     """
     Min-max inventory policy.
@@ -65,6 +147,7 @@ class MinMaxPolicy(BasePolicy):
     min_inventory: int = 20
     max_inventory: int = 80
     price_per_unit: float = 20.0
+    policy_type: ClassVar[PolicyType] = PolicyType.MIN_MAX
 
     def set_parameters(self, min_inventory: int = None, max_inventory: int = None, price_per_unit: float = None):
         if min_inventory is not None:
@@ -74,27 +157,16 @@ class MinMaxPolicy(BasePolicy):
         if price_per_unit is not None:
             self.price_per_unit = price_per_unit
 
-    def decide_order_quantity(self, pending_orders: List[Tuple[int, int]]) -> int:
-        total_pending = sum(qty for qty, _ in pending_orders)
-        inventory_position = self.node.inventory + total_pending
-
-        if inventory_position >= self.max_inventory:
-            return 0
-        if inventory_position < self.min_inventory:
-            order_quantity = self.max_inventory - inventory_position
-            return min(order_quantity, self.node.capacity - self.node.inventory - total_pending)
-        return 0
+    def kernel_params(self) -> Tuple[int, int]:
+        return (self.min_inventory, self.max_inventory)
 
-    def evaluate(self, state: Node, demand_lambda: float = 5.0) -> float:
-        expected_demand = np.random.poisson(lam=demand_lambda)
-        sales = min(state.inventory, expected_demand)
-        revenue = sales * self.price_per_unit
-        holding_cost = (state.inventory - sales) * state.h
-        backorder_cost = state.backorders * state.h
-        return revenue - holding_cost - backorder_cost
+    def decide_order_quantity_fast(self, total_pending: int) -> int:
+        return int(min_max_rule(
+            self.node.inventory, self.node.capacity, total_pending, self.min_inventory, self.max_inventory
+        ))
 
 
-@dataclass
+@dataclass(slots=True)
 class FixedOrderPolicy(BasePolicy):
     """
     Fixed order quantity policy.
@@ -102,6 +174,7 @@ class FixedOrderPolicy(BasePolicy):
     """
     order_quantity: int = 30
     price_per_unit: float = 20.0
+    policy_type: ClassVar[PolicyType] = PolicyType.FIXED_ORDER
 
     def set_parameters(self, order_quantity: int = None, price_per_unit: float = None):
         if order_quantity is not None:
@@ -109,15 +182,8 @@ class FixedOrderPolicy(BasePolicy):
         if price_per_unit is not None:
             self.price_per_unit = price_per_unit
 
-    def decide_order_quantity(self, pending_orders: List[Tuple[int, int]]) -> int:
-        inventory_position = self.node.inventory + sum(qty for qty, _ in pending_orders)
-        available_capacity = self.node.capacity - inventory_position
-        return min(self.order_quantity, max(0, available_capacity))
+    def kernel_params(self) -> Tuple[int]:
+        return (self.order_quantity,)
 
-    def evaluate(self, state: Node, demand_lambda: float = 5.0) -> float:
-        expected_demand = np.random.poisson(lam=demand_lambda)
-        sales = min(state.inventory, expected_demand)
-        revenue = sales * self.price_per_unit
-        holding_cost = (state.inventory - sales) * state.h
-        backorder_cost = state.backorders * state.h
-        return revenue - holding_cost - backorder_cost
+    def decide_order_quantity_fast(self, total_pending: int) -> int:
+        return int(fixed_order_rule(self.node.inventory, self.node.capacity, total_pending, self.order_quantity))